@@ -1,18 +1,81 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Query
-from sqlalchemy import select, and_
+from fastapi import APIRouter, Header, HTTPException, Query, Response, Security
+from sqlalchemy import BigInteger, and_, cast, func, literal_column, or_, select, union_all
+from sqlalchemy.orm import Session
 
 from app.core.database import get_session
-from app.models.sensor_data import SensorData
-from app.schemas.sensor_data import SensorDataCreate, SensorDataOut
-from app.services.ingestion_service import ingest_rest_payload
+from app.core.responses import (
+    ARROW_STREAM_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    arrow_response,
+    ensure_available,
+    json_response,
+    negotiate_media_type,
+    table_response,
+)
+from app.core.security import authorize
+from app.models.device import Device
+from app.models.sensor_data import SensorData, SensorLatest
+from app.schemas.sensor_data import FleetSeriesOut, SensorDataCreate, SensorDataOut, SensorDataPoint
+from app.services.ingestion_service import compressor, ingest_rest_payload
+from app.services.processing_service import (
+    COMPRESSION_DEADBAND,
+    METRICS,
+    align_series,
+    bucket_range,
+    fill_buckets,
+    interpolate_series,
+)
 
 router = APIRouter()
 
+can_read = [Security(authorize, scopes=["data:read"])]
+can_write = [Security(authorize, scopes=["data:write"])]
 
-@router.post("/data/ingest", response_model=SensorDataOut, status_code=201)
+MAX_INTERPOLATED_POINTS = 10000
+# Stored rows read to rebuild one series (MAX_INTERPOLATED_POINTS only caps the output)
+MAX_SERIES_ROWS = 50000
+MAX_FLEET_DEVICES = 500
+MAX_FLEET_BUCKETS = 5000
+
+# Plain columns selected by list_data (same order/names as SensorDataOut)
+SENSOR_DATA_COLUMNS = [getattr(SensorData, name) for name in SensorDataOut.model_fields]
+
+
+def _series_points(session: Session, device_id: str, ts_from: datetime, ts_to: datetime) -> list[dict]:
+    """
+    Persisted points covering [ts_from, ts_to], sorted by ts: the rows inside the window,
+    the nearest rows just outside it (so edges can be interpolated) and, when nothing newer
+    is stored, the device's latest reading, which ends the open compression segment.
+    Raises 422 when the window holds more than MAX_SERIES_ROWS stored rows.
+    """
+    columns = [SensorData.ts, *(getattr(SensorData, m) for m in METRICS)]
+    base = select(*columns).where(SensorData.device_id == device_id)
+    before = base.where(SensorData.ts < ts_from).order_by(SensorData.ts.desc()).limit(1)
+    after = base.where(SensorData.ts > ts_to).order_by(SensorData.ts.asc()).limit(1)
+    inside = base.where(and_(SensorData.ts >= ts_from, SensorData.ts <= ts_to)).order_by(SensorData.ts.asc())
+
+    inside_rows = session.execute(inside.limit(MAX_SERIES_ROWS + 1)).all()
+    if len(inside_rows) > MAX_SERIES_ROWS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Too many stored rows in window (max {MAX_SERIES_ROWS}); narrow the range or use /data/fleet",
+        )
+    rows = [*session.execute(before).all()[::-1], *inside_rows]
+    after_rows = session.execute(after).all()
+    if after_rows:
+        rows.extend(after_rows)
+    else:
+        latest_columns = [SensorLatest.ts, *(getattr(SensorLatest, m) for m in METRICS)]
+        latest = session.execute(select(*latest_columns).where(SensorLatest.device_id == device_id)).first()
+        if latest is not None and (not rows or latest.ts > rows[-1].ts):
+            rows.append(latest)
+    return [r._asdict() for r in rows]
+
+
+@router.post("/data/ingest", response_model=SensorDataOut, status_code=201, dependencies=can_write)
 def ingest_data(payload: SensorDataCreate) -> SensorDataOut:
     """
     Manual ingestion endpoint (useful for testing or non-MQTT clients).
@@ -21,13 +84,26 @@ def ingest_data(payload: SensorDataCreate) -> SensorDataOut:
     return SensorDataOut.model_validate(row)
 
 
-@router.get("/data", response_model=list[SensorDataOut])
+@router.get(
+    "/data",
+    response_model=list[SensorDataOut],
+    responses={200: {"content": {COLUMNAR_JSON_MEDIA_TYPE: {}, ARROW_STREAM_MEDIA_TYPE: {}}}},
+    dependencies=can_read,
+)
 def list_data(
     device_id: Optional[str] = None,
     ts_from: Optional[datetime] = Query(default=None),
     ts_to: Optional[datetime] = Query(default=None),
     limit: int = Query(default=100, ge=1, le=1000),
-) -> list[SensorDataOut]:
+    accept: Optional[str] = Header(default=None),
+) -> Response:
+    """
+    Fast path: selects column tuples and serializes them directly (no ORM entities,
+    no per-row validation). Accept columnar JSON or Arrow IPC for analytics clients.
+    """
+    media_type = negotiate_media_type(accept)
+    ensure_available(media_type)
+
     with get_session() as session:
         conditions = []
         if device_id:
@@ -37,9 +113,224 @@ def list_data(
         if ts_to:
             conditions.append(SensorData.ts <= ts_to)
 
-        stmt = select(SensorData).order_by(SensorData.ts.desc()).limit(limit)
+        stmt = select(*SENSOR_DATA_COLUMNS).order_by(SensorData.ts.desc()).limit(limit)
         if conditions:
             stmt = stmt.where(and_(*conditions))
 
-        rows = session.execute(stmt).scalars().all()
-        return [SensorDataOut.model_validate(r) for r in rows]
+        rows = session.execute(stmt).all()
+
+    return table_response(list(SensorDataOut.model_fields), rows, media_type)
+
+
+@router.get("/data/interpolated", response_model=list[SensorDataPoint], dependencies=can_read)
+def interpolated_data(
+    device_id: str,
+    ts_from: datetime,
+    ts_to: datetime,
+    step_s: int = Query(default=60, ge=1),
+) -> list[SensorDataPoint]:
+    """
+    Regular series rebuilt from compressed storage (linear for SDT, step-hold for deadband).
+    """
+    if ts_to < ts_from:
+        raise HTTPException(status_code=422, detail="ts_to must be >= ts_from")
+    if (ts_to - ts_from).total_seconds() / step_s + 1 > MAX_INTERPOLATED_POINTS:
+        raise HTTPException(status_code=422, detail=f"Too many points (max {MAX_INTERPOLATED_POINTS})")
+
+    with get_session() as session:
+        points = _series_points(session, device_id, ts_from, ts_to)
+
+    method = "previous" if compressor.mode_for(device_id) == COMPRESSION_DEADBAND else "linear"
+    series = interpolate_series(points, ts_from, ts_to, step_s, method=method)
+    return [SensorDataPoint(**p) for p in series]
+
+
+# SQLite caps compound SELECTs at 500 terms; edge lookups are batched below that.
+EDGE_BATCH_SIZE = 200
+
+
+def _epoch_bucket(session: Session, resolution_s: int):
+    """
+    SQL expression for the epoch-aligned bucket (seconds) of SensorData.ts.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        epoch = cast(func.strftime("%s", SensorData.ts), BigInteger)
+    else:
+        epoch = cast(func.floor(func.extract("epoch", SensorData.ts)), BigInteger)
+    # Inline the (validated int) resolution: Postgres only matches the GROUP BY expression
+    # to the selected one when both render identically, which separate bind params do not.
+    resolution = literal_column(str(int(resolution_s)), BigInteger)
+    return (epoch // resolution * resolution).label("bucket")
+
+
+def _edge_rows(session: Session, device_ids: list[str], where, order) -> list:
+    """
+    Nearest stored row per device matching `where` (one index-backed LIMIT 1 per device,
+    sent as UNION ALL batches). No lookback window: sparse devices still get their edge.
+    """
+    columns = [SensorData.device_id, SensorData.ts, *(getattr(SensorData, m) for m in METRICS)]
+    rows = []
+    for i in range(0, len(device_ids), EDGE_BATCH_SIZE):
+        parts = [
+            select(
+                *select(*columns).where(SensorData.device_id == d, where).order_by(order).limit(1).subquery().c
+            )
+            for d in device_ids[i:i + EDGE_BATCH_SIZE]
+        ]
+        rows.extend(session.execute(union_all(*parts)).all())
+    return rows
+
+
+def _fleet_points(
+    session: Session,
+    device_ids: list[str],
+    metrics: list[str],
+    ts_from: datetime,
+    ts_to: datetime,
+    resolution_s: int,
+) -> tuple[dict[str, list[dict]], dict[str, dict[int, dict]]]:
+    """
+    Per device: (points to rebuild the signal, {bucket epoch: averages}).
+
+    Buckets are aggregated in SQL; only the first/last stored row of each non-empty bucket
+    comes back (plus the nearest rows outside the window and the latest reading), which is
+    all the reconstruction needs to fill empty buckets.
+    """
+    bucket = _epoch_bucket(session, resolution_s)
+    grouped = (
+        select(
+            SensorData.device_id,
+            bucket,
+            *(func.avg(getattr(SensorData, m)).label(f"avg_{m}") for m in metrics),
+            func.min(SensorData.ts).label("first_ts"),
+            func.max(SensorData.ts).label("last_ts"),
+        )
+        .where(SensorData.device_id.in_(device_ids), SensorData.ts >= ts_from, SensorData.ts <= ts_to)
+        .group_by(SensorData.device_id, bucket)
+        .subquery()
+    )
+    boundaries = (
+        select(
+            SensorData.device_id,
+            SensorData.ts,
+            *(getattr(SensorData, m) for m in METRICS),
+            grouped.c.bucket,
+            *(grouped.c[f"avg_{m}"] for m in metrics),
+        )
+        .join(
+            grouped,
+            and_(
+                SensorData.device_id == grouped.c.device_id,
+                or_(SensorData.ts == grouped.c.first_ts, SensorData.ts == grouped.c.last_ts),
+            ),
+        )
+        .order_by(SensorData.device_id, SensorData.ts)
+    )
+    latest = select(SensorLatest.device_id, SensorLatest.ts, *(getattr(SensorLatest, m) for m in METRICS)).where(
+        SensorLatest.device_id.in_(device_ids)
+    )
+
+    points: dict[str, list[dict]] = {d: [] for d in device_ids}
+    aggregates: dict[str, dict[int, dict]] = {d: {} for d in device_ids}
+
+    for row in _edge_rows(session, device_ids, SensorData.ts < ts_from, SensorData.ts.desc()):
+        points[row.device_id].append(row._asdict())
+    for row in session.execute(boundaries).all():
+        values = row._asdict()
+        points[row.device_id].append({k: values[k] for k in ("device_id", "ts", *METRICS)})
+        aggregates[row.device_id][int(row.bucket)] = {m: values[f"avg_{m}"] for m in metrics}
+
+    has_after = set()
+    for row in _edge_rows(session, device_ids, SensorData.ts > ts_to, SensorData.ts.asc()):
+        points[row.device_id].append(row._asdict())
+        has_after.add(row.device_id)
+    for row in session.execute(latest).all():
+        series = points[row.device_id]
+        if row.device_id not in has_after and (not series or row.ts > series[-1]["ts"]):
+            series.append(row._asdict())
+    return points, aggregates
+
+
+@router.get(
+    "/data/fleet",
+    response_model=FleetSeriesOut,
+    responses={200: {"content": {ARROW_STREAM_MEDIA_TYPE: {}}}},
+    dependencies=can_read,
+)
+def fleet_data(
+    ts_from: datetime,
+    ts_to: datetime,
+    device_id: list[str] = Query(default=[]),
+    location: Optional[str] = None,
+    resolution_s: int = Query(default=60, ge=1),
+    metric: list[str] = Query(default=list(METRICS)),
+    accept: Optional[str] = Header(default=None),
+) -> Response:
+    """
+    Compare devices (explicit ids and/or every device at a location) over the same
+    time buckets. Buckets with stored rows hold their average (computed in SQL); empty
+    buckets hold the reconstructed series at the bucket start (linear for SDT/uncompressed,
+    step-hold for deadband), so flat periods that compression did not store still have
+    values. Buckets outside the stored data are null.
+
+    JSON (default) and columnar JSON return FleetSeriesOut; Arrow returns a long table
+    (ts, device_id, one column per metric).
+    """
+    media_type = negotiate_media_type(accept)
+    ensure_available(media_type)
+
+    unknown = [m for m in metric if m not in METRICS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown metric(s): {', '.join(unknown)}")
+    if not device_id and not location:
+        raise HTTPException(status_code=422, detail="Provide device_id and/or location")
+    if ts_to < ts_from:
+        raise HTTPException(status_code=422, detail="ts_to must be >= ts_from")
+
+    start, n_buckets = bucket_range(ts_from, ts_to, resolution_s)
+    if n_buckets > MAX_FLEET_BUCKETS:
+        raise HTTPException(status_code=422, detail=f"Too many buckets (max {MAX_FLEET_BUCKETS})")
+
+    with get_session() as session:
+        device_ids = list(dict.fromkeys(device_id))
+        if location:
+            located = session.execute(select(Device.device_id).where(Device.location == location)).scalars().all()
+            device_ids.extend(d for d in located if d not in device_ids)
+        if len(device_ids) > MAX_FLEET_DEVICES:
+            raise HTTPException(status_code=422, detail=f"Too many devices (max {MAX_FLEET_DEVICES})")
+
+        points, aggregates = ({}, {})
+        if device_ids:
+            points, aggregates = _fleet_points(session, device_ids, metric, start, ts_to, resolution_s)
+
+    series = {
+        d: fill_buckets(
+            align_series(
+                points[d],
+                start,
+                n_buckets,
+                resolution_s,
+                metrics=metric,
+                method="previous" if compressor.mode_for(d) == COMPRESSION_DEADBAND else "linear",
+            ),
+            aggregates[d],
+            start,
+            resolution_s,
+        )
+        for d in device_ids
+    }
+    ts = [start + timedelta(seconds=i * resolution_s) for i in range(n_buckets)]
+
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return arrow_response(
+            {
+                "ts": ts * len(device_ids),
+                "device_id": [d for d in device_ids for _ in range(n_buckets)],
+                **{m: [v for d in device_ids for v in series[d][m]] for m in metric},
+            }
+        )
+
+    return json_response(
+        {"resolution_s": resolution_s, "metrics": metric, "ts": ts, "series": series},
+        media_type=media_type,
+    )
@@ -1,15 +1,19 @@
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Security
 from sqlalchemy import select
 
 from app.core.database import get_session
+from app.core.security import authorize
 from app.models.device import Device
 from app.schemas.device import DeviceCreate, DeviceOut
 
 router = APIRouter()
 
+can_read = [Security(authorize, scopes=["devices:read"])]
+can_write = [Security(authorize, scopes=["devices:write"])]
 
-@router.post("/devices", response_model=DeviceOut, status_code=201)
+
+@router.post("/devices", response_model=DeviceOut, status_code=201, dependencies=can_write)
 def create_device(payload: DeviceCreate) -> DeviceOut:
     with get_session() as session:
         existing = session.execute(select(Device).where(Device.device_id == payload.device_id)).scalar_one_or_none()
@@ -27,14 +31,14 @@ def create_device(payload: DeviceCreate) -> DeviceOut:
         return DeviceOut.model_validate(device)
 
 
-@router.get("/devices", response_model=list[DeviceOut])
+@router.get("/devices", response_model=list[DeviceOut], dependencies=can_read)
 def list_devices() -> list[DeviceOut]:
     with get_session() as session:
         rows = session.execute(select(Device).order_by(Device.created_at.desc())).scalars().all()
         return [DeviceOut.model_validate(d) for d in rows]
 
 
-@router.get("/devices/{device_id}", response_model=DeviceOut)
+@router.get("/devices/{device_id}", response_model=DeviceOut, dependencies=can_read)
 def get_device(device_id: str) -> DeviceOut:
     with get_session() as session:
         device = session.execute(select(Device).where(Device.device_id == device_id)).scalar_one_or_none()
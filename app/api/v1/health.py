@@ -1,9 +1,29 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
+
+from app.core.database import check_db
 
 router = APIRouter()
 
 
 @router.get("/health")
 def health() -> dict:
+    """
+    Liveness: the process is up. No dependency checks.
+    """
     return {"status": "ok"}
 
+
+@router.get("/health/ready")
+def ready(request: Request, response: Response) -> dict:
+    """
+    Readiness: schema initialized, database reachable and, for ingest roles, MQTT connected.
+    """
+    state = request.app.state
+    checks = {"database": check_db() if state.db_initialized.is_set() else "not_initialized"}
+    if state.mqtt_consumer is not None:
+        checks["mqtt"] = "ok" if state.mqtt_consumer.connected else "disconnected"
+
+    ok = all(v == "ok" for v in checks.values())
+    if not ok:
+        response.status_code = 503
+    return {"status": "ready" if ok else "not_ready", "checks": checks}
@@ -8,13 +8,40 @@ class Settings(BaseSettings):
     environment: str = "development"
     log_level: str = "INFO"
 
-    database_url: str
+    # Process role: "api" (REST only), "ingest" (MQTT consumer + health), "all" (both)
+    app_role: str = "all"
+
+    # Optional so the app can be imported without a database; required to serve data.
+    database_url: str | None = None
+    # Schema at startup: "create" (create_all, blocking), "deferred" (create_all in
+    # background, readiness waits), "skip" (migrations manage the schema)
+    db_init: str = "create"
 
     mqtt_host: str = "localhost"
     mqtt_port: int = 1883
     mqtt_keepalive: int = 60
     mqtt_topic: str = "factory/+/sensors"
 
+    # Auth: off unless one of these is set (see app/core/security.py)
+    api_key: str | None = None
+    api_keys_file: str | None = None
+    api_keys_reload_s: float = 5.0
+    token_secret: str | None = None
+    token_cache_size: int = 4096
+
+    # Ingestion compression: "off" | "deadband" | "sdt" (swinging door)
+    compression_mode: str = "off"
+    # Tolerance per metric; per-device overrides as JSON, e.g. {"press_07": {"pressure_bar": 0.01}}
+    compression_deviation: dict[str, float] = {
+        "temperature_c": 0.5,
+        "pressure_bar": 0.05,
+        "vibration_mm_s": 0.5,
+    }
+    compression_device_deviation: dict[str, dict[str, float]] = {}
+    compression_device_modes: dict[str, str] = {}
+    # Force a stored row at least this often (seconds, 0 = never)
+    compression_max_interval_s: float = 600.0
+
 
 settings = Settings()
 
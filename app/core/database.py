@@ -1,8 +1,11 @@
 
 import logging
+import threading
 from contextlib import contextmanager
+from typing import Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.core.config import settings
@@ -10,13 +13,27 @@ from app.models.base import Base
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    future=True,
-)
+# Created on first use so importing the app needs neither a database nor DATABASE_URL.
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_lock = threading.Lock()
 
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+
+def get_engine() -> Engine:
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                if not settings.database_url:
+                    raise RuntimeError("DATABASE_URL is not configured")
+                engine = create_engine(
+                    settings.database_url,
+                    pool_pre_ping=True,
+                    future=True,
+                )
+                _session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+                _engine = engine
+    return _engine
 
 
 def init_db() -> None:
@@ -25,12 +42,29 @@ def init_db() -> None:
     This creates tables for a clean demo/prototype environment.
     """
     logger.info("Initializing database (create_all)")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
+
+
+def check_db() -> str:
+    """
+    Readiness probe: "ok", "not_configured" or "unreachable". Called on every probe,
+    so failures are reported in the result rather than logged with a traceback.
+    """
+    if not settings.database_url:
+        return "not_configured"
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return "ok"
+    except Exception as exc:
+        logger.debug("Database not reachable", extra={"error": str(exc)})
+        return "unreachable"
 
 
 @contextmanager
 def get_session() -> Session:
-    session: Session = SessionLocal()
+    get_engine()
+    session: Session = _session_factory()
     try:
         yield session
         session.commit()
@@ -7,7 +7,7 @@ from typing import Any, Dict, Optional
 import paho.mqtt.client as mqtt
 
 from app.core.config import settings
-from app.services.ingestion_service import ingest_sensor_payload
+from app.services.ingestion_service import flush_compressed, ingest_sensor_payload, recover_held_readings
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +29,10 @@ class MqttConsumer:
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
 
+    @property
+    def connected(self) -> bool:
+        return self._client is not None and self._client.is_connected()
+
     def start(self) -> None:
         if self._thread and self._thread.is_alive():
             return
@@ -47,9 +51,18 @@ class MqttConsumer:
                 logger.exception("Failed to disconnect MQTT client")
         if self._thread is not None:
             self._thread.join(timeout=5)
+        try:
+            flush_compressed()
+        except Exception:
+            logger.exception("Failed to flush compressed readings")
         logger.info("MQTT consumer stopped")
 
     def _run(self) -> None:
+        try:
+            recover_held_readings()
+        except Exception:
+            logger.exception("Failed to recover held readings")
+
         client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
         self._client = client
 
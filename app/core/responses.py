@@ -0,0 +1,118 @@
+import importlib.util
+import logging
+from typing import Any, Dict, Sequence
+
+import orjson
+from fastapi import HTTPException, Response
+
+logger = logging.getLogger(__name__)
+
+# Media types negotiated through the Accept header for tabular results.
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.iot.columnar+json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+SUPPORTED_MEDIA_TYPES = (JSON_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE)
+
+# orjson writes UTC offsets as "+00:00" by default; pydantic (previous wire format) writes "Z".
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _parse_accept(accept: str) -> list[tuple[str, float]]:
+    ranges = []
+    for item in accept.split(","):
+        media, *params = (p.strip() for p in item.split(";"))
+        if not media:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media.lower(), q))
+    return ranges
+
+
+def _quality(media_type: str, ranges: list[tuple[str, float]]) -> tuple[float, int]:
+    """
+    (q, specificity) of the most specific Accept range matching `media_type`.
+    """
+    main_type = media_type.split("/")[0]
+    best = (0.0, -1)
+    for media, q in ranges:
+        if media == media_type:
+            specificity = 2
+        elif media == f"{main_type}/*":
+            specificity = 1
+        elif media == "*/*":
+            specificity = 0
+        else:
+            continue
+        if specificity > best[1]:
+            best = (q, specificity)
+    return best
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """
+    Pick the response format from the Accept header (q-values honoured, explicit types
+    win over wildcards). Defaults to row-oriented JSON when nothing supported is acceptable.
+    """
+    ranges = _parse_accept(accept or "")
+    if not ranges:
+        return JSON_MEDIA_TYPE
+
+    best, best_key = JSON_MEDIA_TYPE, (0.0, -1)
+    for media_type in SUPPORTED_MEDIA_TYPES:
+        key = _quality(media_type, ranges)
+        if key[0] > 0 and key > best_key:
+            best, best_key = media_type, key
+    return best
+
+
+def ensure_available(media_type: str) -> None:
+    """
+    Fail fast (406) for formats whose optional dependency is missing, before querying.
+    """
+    if media_type == ARROW_STREAM_MEDIA_TYPE and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=406, detail="Arrow output not available (pyarrow not installed)")
+
+
+def json_response(content: Any, media_type: str = JSON_MEDIA_TYPE) -> Response:
+    """
+    orjson-encoded response, bypassing response_model validation.
+    """
+    return Response(content=orjson.dumps(content, option=ORJSON_OPTIONS), media_type=media_type)
+
+
+def arrow_response(data: Dict[str, Sequence[Any]]) -> Response:
+    """
+    Arrow IPC stream of named columns. Requires the optional `pyarrow` package.
+    """
+    ensure_available(ARROW_STREAM_MEDIA_TYPE)
+    import pyarrow as pa
+
+    table = pa.table({c: list(v) for c, v in data.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+
+def table_response(columns: Sequence[str], rows: Sequence[Sequence[Any]], media_type: str) -> Response:
+    """
+    Serialize plain column tuples (no ORM entities, no pydantic validation).
+
+    - application/json: list of objects (same shape as the response models)
+    - columnar JSON: {"columns": [...], "data": {column: [values...]}}
+    - Arrow IPC stream: requires the optional `pyarrow` package
+    """
+    if media_type == JSON_MEDIA_TYPE:
+        return json_response([dict(zip(columns, r)) for r in rows])
+
+    data = {c: list(values) for c, values in zip(columns, zip(*rows))} if rows else {c: [] for c in columns}
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return arrow_response(data)
+    return json_response({"columns": list(columns), "data": data}, media_type=COLUMNAR_JSON_MEDIA_TYPE)
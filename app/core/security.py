@@ -1,27 +1,49 @@
+import hashlib
+import hmac
+import json
 import logging
+import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence
 
-from fastapi import Depends, HTTPException, Security, status
-from fastapi.security import APIKeyHeader
+from fastapi import HTTPException, Security, status
+from fastapi.security import APIKeyHeader, HTTPAuthorizationCredentials, HTTPBearer, SecurityScopes
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Simple API key scheme (pragmatic for internal/industrial services)
-# You can later replace with OAuth2/JWT if needed.
+# Two schemes, both optional per request:
+# - X-API-Key: long-lived keys for gateways/clients (stored hashed, with scopes)
+# - Authorization: Bearer <signed token>: short-lived service tokens (see create_signed_token)
 API_KEY_HEADER_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_HEADER_NAME, auto_error=False)
+bearer_scheme = HTTPBearer(auto_error=False)
 
+ALL_SCOPES = "*"
 
-def _get_configured_api_key() -> Optional[str]:
+
+@dataclass(frozen=True)
+class Principal:
+    name: str
+    scopes: frozenset[str]
+
+    def has_scopes(self, required: Sequence[str]) -> bool:
+        return ALL_SCOPES in self.scopes or all(s in self.scopes for s in required)
+
+
+def hash_api_key(api_key: str) -> str:
     """
-    Fetch API key from env. If not configured, authentication can be disabled.
+    Hash stored in the API keys file. Keys are random (generate_api_key), so a plain
+    SHA-256 is enough and keeps verification in the microsecond range.
     """
-    # Optional env var; if missing, auth is "off" unless you enforce it.
-    return getattr(settings, "api_key", None)
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
 
 
 def generate_api_key(length: int = 32) -> str:
@@ -35,61 +57,139 @@ def generate_api_key(length: int = 32) -> str:
     return secrets.token_hex(length)
 
 
-def require_api_key(api_key: Optional[str] = Security(api_key_header)) -> str:
+class ApiKeyStore:
     """
-    Dependency that enforces API key if configured.
-    If API key is not configured in env, it allows requests (dev-friendly).
+    In-memory lookup table: sha256(key) -> Principal.
+
+    Sources:
+    - settings.api_key: single legacy key with all scopes
+    - settings.api_keys_file: JSON list of {"name", "key_sha256", "scopes"}; reloaded when
+      its mtime changes (checked at most every settings.api_keys_reload_s seconds)
     """
-    configured = _get_configured_api_key()
-    if not configured:
-        # Auth disabled (dev mode). You can flip this to enforce by default if you prefer.
-        return ""
 
-    if not api_key or api_key != configured:
-        logger.warning("Unauthorized request: invalid API key")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or missing API key",
-        )
+    def __init__(self, path: Optional[str], legacy_key: Optional[str], reload_s: float) -> None:
+        self._path = path
+        self._legacy_key = legacy_key
+        self._reload_s = reload_s
+        self._keys: Dict[str, Principal] = {}
+        self._file_keys: Dict[str, Principal] = {}
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._keys) or bool(self._path)
+
+    def lookup(self, api_key: str) -> Optional[Principal]:
+        self._maybe_reload()
+        # Keyed by the hash, so lookup timing reveals nothing about the key itself.
+        return self._keys.get(hash_api_key(api_key))
 
-    return api_key
+    def _maybe_reload(self) -> None:
+        if not self._path or time.monotonic() < self._next_check:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self._reload_s
+            try:
+                mtime = os.stat(self._path).st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                self._load()
 
+    def _load(self) -> None:
+        file_keys = self._file_keys
+        if self._path:
+            try:
+                self._mtime = os.stat(self._path).st_mtime
+            except FileNotFoundError:
+                # Deleting the file revokes its keys (fail closed). _mtime stays None, so
+                # this is logged once and reloaded when the file comes back.
+                self._mtime = None
+                file_keys = {}
+                logger.warning("API keys file not found, file keys revoked", extra={"path": self._path})
+            else:
+                try:
+                    with open(self._path, encoding="utf-8") as f:
+                        entries = json.load(f)
+                    file_keys = {
+                        entry["key_sha256"].lower(): Principal(
+                            name=entry["name"],
+                            scopes=frozenset(entry.get("scopes", [])),
+                        )
+                        for entry in entries
+                    }
+                except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                    # Unreadable/malformed: keep the previous file entries rather than locking
+                    # everyone out (retried when the file's mtime changes).
+                    logger.exception("Failed to load API keys file", extra={"path": self._path})
 
-# ---- Optional: Signed "service tokens" (lightweight, no external libs) ----
+        # The legacy key does not depend on the file and is always installed.
+        keys = dict(file_keys)
+        if self._legacy_key:
+            keys[hash_api_key(self._legacy_key)] = Principal(name="default", scopes=frozenset({ALL_SCOPES}))
+
+        self._file_keys = file_keys
+        self._keys = keys
+        logger.info("API keys loaded", extra={"count": len(keys)})
+
+
+# ---- Signed "service tokens" (lightweight, no external libs) ----
 # This is NOT a full JWT implementation; it's a pragmatic signed token that can be useful
-# for internal service-to-service calls. If you want real JWT, tell me and I’ll add it.
+# for internal service-to-service calls: subject|exp_epoch|scope1,scope2|signature
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def create_signed_token(subject: str, secret: str, expires_in_seconds: int = 3600) -> str:
+@lru_cache(maxsize=8)
+def _hmac_key(secret: str) -> hmac.HMAC:
+    """
+    HMAC object keyed once per secret; callers .copy() it (skips re-hashing the key).
+    """
+    return hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+def _sign(secret: str, message: str) -> str:
+    mac = _hmac_key(secret).copy()
+    mac.update(message.encode("utf-8"))
+    return mac.hexdigest()
+
+
+def create_signed_token(
+    subject: str,
+    secret: str,
+    expires_in_seconds: int = 3600,
+    scopes: Sequence[str] = (),
+) -> str:
     """
-    Create a simple signed token: subject|exp_epoch|signature
-    signature = hex(hmac_sha256(subject|exp, secret))
+    Create a simple signed token: subject|exp_epoch|scopes|signature
+    signature = hex(hmac_sha256(subject|exp|scopes, secret))
     """
-    import hmac
-    import hashlib
+    if "|" in subject:
+        raise ValueError("subject must not contain '|'")
+    if any("|" in s or "," in s for s in scopes):
+        raise ValueError("scopes must not contain '|' or ','")
 
     exp = int((_utcnow() + timedelta(seconds=expires_in_seconds)).timestamp())
-    message = f"{subject}|{exp}".encode("utf-8")
-    sig = hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
-    return f"{subject}|{exp}|{sig}"
+    message = f"{subject}|{exp}|{','.join(scopes)}"
+    return f"{message}|{_sign(secret, message)}"
 
 
 def verify_signed_token(token: str, secret: str) -> dict[str, Any]:
     """
     Verify token created by create_signed_token.
-    Returns {"subject": ..., "exp": ...} if valid; raises HTTPException otherwise.
+    Returns {"subject": ..., "exp": ..., "scopes": [...]} if valid; raises HTTPException otherwise.
     """
-    import hmac
-    import hashlib
-
     parts = token.split("|")
-    if len(parts) != 3:
+    if len(parts) != 4:
         raise HTTPException(status_code=401, detail="Invalid token format")
 
-    subject, exp_str, sig = parts
+    subject, exp_str, scopes, sig = parts
     try:
         exp = int(exp_str)
     except ValueError:
@@ -98,11 +198,76 @@ def verify_signed_token(token: str, secret: str) -> dict[str, Any]:
     if int(_utcnow().timestamp()) > exp:
         raise HTTPException(status_code=401, detail="Token expired")
 
-    message = f"{subject}|{exp}".encode("utf-8")
-    expected = hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
-
+    expected = _sign(secret, f"{subject}|{exp_str}|{scopes}")
     if not hmac.compare_digest(expected, sig):
         raise HTTPException(status_code=401, detail="Invalid token signature")
 
-    return {"subject": subject, "exp": exp}
+    return {"subject": subject, "exp": exp, "scopes": [s for s in scopes.split(",") if s]}
+
+
+class TokenVerifier:
+    """
+    verify_signed_token + a small LRU of already verified tokens (gateways reuse
+    the same token for many requests). Expiry is still checked on every hit.
+    """
+
+    def __init__(self, secret: str, cache_size: int = 4096) -> None:
+        self._secret = secret
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[str, tuple[int, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> Principal:
+        with self._lock:
+            hit = self._cache.get(token)
+            if hit is not None:
+                self._cache.move_to_end(token)
+        if hit is not None:
+            exp, principal = hit
+            if time.time() <= exp:
+                return principal
+
+        claims = verify_signed_token(token, self._secret)
+        principal = Principal(name=claims["subject"], scopes=frozenset(claims["scopes"]))
+        with self._lock:
+            self._cache[token] = (claims["exp"], principal)
+            self._cache.move_to_end(token)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return principal
+
+
+api_key_store = ApiKeyStore(settings.api_keys_file, settings.api_key, settings.api_keys_reload_s)
+token_verifier = TokenVerifier(settings.token_secret, settings.token_cache_size) if settings.token_secret else None
+
+
+def authorize(
+    security_scopes: SecurityScopes,
+    api_key: Optional[str] = Security(api_key_header),
+    bearer: Optional[HTTPAuthorizationCredentials] = Security(bearer_scheme),
+) -> Principal:
+    """
+    Dependency for /api/v1 routes: Security(authorize, scopes=["data:read"]).
+    If neither API keys nor a token secret are configured, auth is off (dev-friendly).
+    """
+    if not api_key_store.enabled and token_verifier is None:
+        return Principal(name="anonymous", scopes=frozenset({ALL_SCOPES}))
+
+    principal: Optional[Principal] = None
+    if api_key:
+        principal = api_key_store.lookup(api_key)
+    elif bearer is not None and token_verifier is not None:
+        principal = token_verifier.verify(bearer.credentials)
+
+    if principal is None:
+        logger.warning("Unauthorized request: invalid or missing credentials")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing API key",
+        )
+
+    if not principal.has_scopes(security_scopes.scopes):
+        logger.warning("Forbidden request: missing scope", extra={"principal": principal.name})
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient scope")
 
+    return principal
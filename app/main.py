@@ -1,40 +1,96 @@
+import logging
+import threading
+
 from fastapi import FastAPI
 
-from app.api.v1.devices import router as devices_router
-from app.api.v1.data import router as data_router
 from app.api.v1.health import router as health_router
 from app.core.config import settings
 from app.core.database import init_db
 from app.core.logging import configure_logging
-from app.core.mqtt_client import MqttConsumer
+
+logger = logging.getLogger(__name__)
+
+ROLES = ("api", "ingest", "all")
+DB_INIT_MODES = ("create", "deferred", "skip")
+DB_INIT_RETRY_MIN_S = 1.0
+DB_INIT_RETRY_MAX_S = 60.0
 
 
 def create_app() -> FastAPI:
     configure_logging()
 
+    if settings.app_role not in ROLES:
+        raise ValueError(f"Unknown APP_ROLE: {settings.app_role}")
+    if settings.db_init not in DB_INIT_MODES:
+        raise ValueError(f"Unknown DB_INIT: {settings.db_init}")
+
+    serve_api = settings.app_role in ("api", "all")
+    run_ingest = settings.app_role in ("ingest", "all")
+
     app = FastAPI(
         title=settings.app_name,
         version="1.0.0",
         description="Industrial IoT backend: MQTT ingestion, processing, SQL persistence, REST APIs.",
     )
 
+    # Health (liveness/readiness) is served by every role.
     app.include_router(health_router, prefix="/api/v1", tags=["health"])
-    app.include_router(devices_router, prefix="/api/v1", tags=["devices"])
-    app.include_router(data_router, prefix="/api/v1", tags=["data"])
 
-    mqtt_consumer = MqttConsumer()
+    if serve_api:
+        from app.api.v1.data import router as data_router
+        from app.api.v1.devices import router as devices_router
+
+        app.include_router(devices_router, prefix="/api/v1", tags=["devices"])
+        app.include_router(data_router, prefix="/api/v1", tags=["data"])
+
+    app.state.db_initialized = threading.Event()
+    app.state.mqtt_consumer = None
+    if run_ingest:
+        # paho-mqtt is only imported by processes that own the subscription.
+        from app.core.mqtt_client import MqttConsumer
+
+        app.state.mqtt_consumer = MqttConsumer()
+
+    app.state.stopping = threading.Event()
+
+    def schema_ready() -> None:
+        # The consumer must not ack messages (or run recovery) before the tables exist.
+        if app.state.mqtt_consumer is not None and not app.state.stopping.is_set():
+            app.state.mqtt_consumer.start()
+        app.state.db_initialized.set()
+
+    def initialize_db() -> None:
+        # Deferred mode: keep retrying (exponential backoff) until the schema is in place.
+        delay = DB_INIT_RETRY_MIN_S
+        while not app.state.stopping.is_set():
+            try:
+                init_db()
+            except Exception:
+                logger.exception("Database initialization failed", extra={"retry_in_s": delay})
+            else:
+                schema_ready()
+                return
+            app.state.stopping.wait(delay)
+            delay = min(delay * 2, DB_INIT_RETRY_MAX_S)
 
     @app.on_event("startup")
     def on_startup() -> None:
-        init_db()
-        mqtt_consumer.start()
+        if settings.db_init == "deferred":
+            # The MQTT consumer is started by initialize_db once the schema exists.
+            threading.Thread(target=initialize_db, name="db-init", daemon=True).start()
+            return
+
+        if settings.db_init == "create":
+            init_db()
+        schema_ready()
 
     @app.on_event("shutdown")
     def on_shutdown() -> None:
-        mqtt_consumer.stop()
+        app.state.stopping.set()
+        if app.state.mqtt_consumer is not None:
+            app.state.mqtt_consumer.stop()
 
     return app
 
 
 app = create_app()
-
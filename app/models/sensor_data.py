@@ -30,3 +30,21 @@ class SensorData(Base):
         Index("ix_sensor_data_device_ts", "device_id", "ts"),
     )
 
+
+class SensorLatest(Base):
+    """
+    Newest reading per device (upserted when compression is on). It ends the open
+    compression segment, which only exists in the ingest process memory otherwise.
+    """
+    __tablename__ = "sensor_latest"
+
+    device_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    temperature_c: Mapped[float | None] = mapped_column(Float, nullable=True)
+    pressure_bar: Mapped[float | None] = mapped_column(Float, nullable=True)
+    vibration_mm_s: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now, nullable=False)
+
+    source_topic: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -22,3 +22,21 @@ class SensorDataOut(BaseModel):
     ingested_at: datetime
     source_topic: str | None
 
+
+class SensorDataPoint(BaseModel):
+    """
+    Reconstructed (interpolated) reading, no DB identity.
+    """
+    ts: datetime
+    temperature_c: float | None
+    pressure_bar: float | None
+    vibration_mm_s: float | None
+
+class FleetSeriesOut(BaseModel):
+    """
+    Columnar, time-aligned series: series[device_id][metric][i] is the value for ts[i].
+    """
+    resolution_s: int
+    metrics: list[str]
+    ts: list[datetime]
+    series: dict[str, dict[str, list[float | None]]]
@@ -1,21 +1,112 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
+from sqlalchemy import exists, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
 from app.core.database import get_session
-from app.models.sensor_data import SensorData
+from app.models.sensor_data import SensorData, SensorLatest, utc_now
 from app.schemas.sensor_data import SensorDataCreate
-from app.services.processing_service import normalize_payload, detect_anomalies
+from app.services.processing_service import (
+    COMPRESSION_OFF,
+    METRICS,
+    CompressionFilter,
+    normalize_payload,
+    detect_anomalies,
+)
 from app.services.sync_service import ensure_device_exists
 
 logger = logging.getLogger(__name__)
 
+compressor = CompressionFilter(
+    mode=settings.compression_mode,
+    deviation=settings.compression_deviation,
+    device_deviation=settings.compression_device_deviation,
+    device_modes=settings.compression_device_modes,
+    max_interval_s=settings.compression_max_interval_s,
+)
+
+
+def _upsert_latest(session: Session, reading: Dict[str, Any]) -> None:
+    values = {
+        "device_id": reading["device_id"],
+        **{m: reading.get(m) for m in METRICS},
+        "ts": reading.get("ts"),
+        "source_topic": reading.get("source_topic"),
+        "updated_at": utc_now(),
+    }
+    dialect = session.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        session.merge(SensorLatest(**values))
+        return
+
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(SensorLatest).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SensorLatest.device_id],
+        set_={k: stmt.excluded[k] for k in values if k != "device_id"},
+        # Late/out-of-order messages must not move the latest value backwards.
+        where=SensorLatest.ts < stmt.excluded.ts,
+    )
+    session.execute(stmt)
+
+
+def _persist(
+    readings: List[Dict[str, Any]],
+    latest: Optional[Dict[str, Any]] = None,
+    refresh: bool = False,
+) -> List[SensorData]:
+    if not readings and latest is None:
+        return []
+
+    with get_session() as session:
+        rows = [
+            SensorData(
+                device_id=r["device_id"],
+                temperature_c=r.get("temperature_c"),
+                pressure_bar=r.get("pressure_bar"),
+                vibration_mm_s=r.get("vibration_mm_s"),
+                ts=r.get("ts"),
+                source_topic=r.get("source_topic"),
+            )
+            for r in readings
+        ]
+        session.add_all(rows)
+        if latest is not None:
+            _upsert_latest(session, latest)
+        session.flush()
+        if refresh:
+            for row in rows:
+                session.refresh(row)
+        return rows
+
+
+def _latest_if_compressed(reading: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return reading if compressor.mode_for(reading["device_id"]) != COMPRESSION_OFF else None
+
+
+def _persist_compressed(reading: Dict[str, Any], force: bool = False, refresh: bool = False) -> List[SensorData]:
+    """
+    Run the reading through the compressor and persist the result. The compressor moves
+    its trend before the write, so on failure the device trend is reset to stay in sync
+    with what the database actually holds.
+    """
+    try:
+        return _persist(compressor.offer(reading, force=force), latest=_latest_if_compressed(reading), refresh=refresh)
+    except Exception:
+        compressor.reset(reading["device_id"])
+        raise
+
 
 def ingest_sensor_payload(topic: str, payload: Dict[str, Any]) -> None:
     """
     Called by MQTT consumer. Best effort ingestion:
     - normalize
     - ensure device exists
-    - persist
+    - compress (deadband/SDT, see settings.compression_mode)
+    - persist (+ latest reading, so the open compression segment is queryable)
     """
     normalized = normalize_payload(payload)
     normalized = detect_anomalies(normalized)
@@ -27,27 +118,19 @@ def ingest_sensor_payload(topic: str, payload: Dict[str, Any]) -> None:
 
     ensure_device_exists(device_id)
 
-    with get_session() as session:
-        row = SensorData(
-            device_id=device_id,
-            temperature_c=normalized.get("temperature_c"),
-            pressure_bar=normalized.get("pressure_bar"),
-            vibration_mm_s=normalized.get("vibration_mm_s"),
-            ts=normalized.get("ts"),
-            source_topic=topic,
-        )
-        session.add(row)
-        session.flush()
+    normalized["source_topic"] = topic
+    _persist_compressed(normalized)
 
-        # Log anomalies for observability
-        anomalies = normalized.get("anomalies", [])
-        if anomalies:
-            logger.warning("Anomalies detected", extra={"device_id": device_id, "anomalies": anomalies})
+    # Log anomalies for observability
+    anomalies = normalized.get("anomalies", [])
+    if anomalies:
+        logger.warning("Anomalies detected", extra={"device_id": device_id, "anomalies": anomalies})
 
 
 def ingest_rest_payload(payload: SensorDataCreate) -> SensorData:
     """
     Manual ingestion (REST). Reuses same pipeline logic.
+    Always persisted (bypasses compression tolerance), but keeps the trend in sync.
     """
     d = payload.model_dump()
     normalized = normalize_payload(d)
@@ -56,17 +139,40 @@ def ingest_rest_payload(payload: SensorDataCreate) -> SensorData:
     device_id = normalized.get("device_id", "")
     ensure_device_exists(device_id)
 
+    normalized["source_topic"] = "rest/manual"
+    rows = _persist_compressed(normalized, force=True, refresh=True)
+    return rows[-1]
+
+
+def flush_compressed() -> None:
+    """
+    Persist readings held back by the compressor (call on shutdown).
+    """
+    readings = compressor.flush()
+    _persist(readings)
+    if readings:
+        logger.info("Flushed held readings", extra={"count": len(readings)})
+
+
+def recover_held_readings() -> None:
+    """
+    After a crash the held reading of each open segment only survives in sensor_latest.
+    Persist those not yet in sensor_data so the next segment starts from them
+    (call before consuming).
+    """
+    stored = exists().where(SensorData.device_id == SensorLatest.device_id, SensorData.ts >= SensorLatest.ts)
     with get_session() as session:
-        row = SensorData(
-            device_id=device_id,
-            temperature_c=normalized.get("temperature_c"),
-            pressure_bar=normalized.get("pressure_bar"),
-            vibration_mm_s=normalized.get("vibration_mm_s"),
-            ts=normalized.get("ts"),
-            source_topic="rest/manual",
+        pending = session.execute(select(SensorLatest).where(~stored)).scalars().all()
+        session.add_all(
+            SensorData(
+                device_id=p.device_id,
+                temperature_c=p.temperature_c,
+                pressure_bar=p.pressure_bar,
+                vibration_mm_s=p.vibration_mm_s,
+                ts=p.ts,
+                source_topic=p.source_topic,
+            )
+            for p in pending
         )
-        session.add(row)
-        session.flush()
-        session.refresh(row)
-        return row
-
+    if pending:
+        logger.info("Recovered held readings", extra={"count": len(pending)})
@@ -1,6 +1,8 @@
 import logging
-from datetime import datetime
-from typing import Any, Dict
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -65,3 +67,303 @@ def detect_anomalies(data: Dict[str, Any]) -> Dict[str, Any]:
     data["anomalies"] = anomalies
     return data
 
+
+
+# ---- Compression (deadband / swinging door) ----
+# Flat signals dominate industrial telemetry. Instead of persisting every reading we
+# keep an in-memory trend per device and only archive the points needed to rebuild
+# the series within a tolerance (same idea as historian "exception + compression").
+
+METRICS = ("temperature_c", "pressure_bar", "vibration_mm_s")
+
+COMPRESSION_OFF = "off"
+COMPRESSION_DEADBAND = "deadband"
+COMPRESSION_SDT = "sdt"
+COMPRESSION_MODES = (COMPRESSION_OFF, COMPRESSION_DEADBAND, COMPRESSION_SDT)
+
+
+def _epoch(ts: datetime) -> float:
+    """
+    Seconds since epoch. Naive datetimes are treated as UTC (see normalize_payload fallback).
+    """
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+@dataclass
+class _DeviceTrend:
+    archived: Dict[str, Any]
+    held: Optional[Dict[str, Any]] = None
+    # SDT door slopes per metric: (upper door slope, lower door slope)
+    doors: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+
+class CompressionFilter:
+    """
+    Decides which readings must be persisted.
+
+    - deadband: persist a reading when any metric moved more than its tolerance
+      since the last persisted reading.
+    - sdt (swinging door): persist the previous reading when the current one no longer
+      fits in the door opened from the last persisted reading (+/- tolerance).
+      Linear interpolation between persisted rows stays within tolerance.
+
+    `max_interval_s` forces a row at least that often so gaps stay bounded.
+    Thread-safe: MQTT thread and REST handlers share the same instance.
+    """
+
+    def __init__(
+        self,
+        mode: str = COMPRESSION_OFF,
+        deviation: Optional[Dict[str, float]] = None,
+        device_deviation: Optional[Dict[str, Dict[str, float]]] = None,
+        device_modes: Optional[Dict[str, str]] = None,
+        max_interval_s: float = 0.0,
+    ) -> None:
+        for m in [mode, *(device_modes or {}).values()]:
+            if m not in COMPRESSION_MODES:
+                raise ValueError(f"Unknown compression mode: {m}")
+        self._mode = mode
+        self._deviation = dict(deviation or {})
+        self._device_deviation = dict(device_deviation or {})
+        self._device_modes = dict(device_modes or {})
+        self._max_interval_s = max_interval_s
+        self._trends: Dict[str, _DeviceTrend] = {}
+        self._lock = threading.Lock()
+
+    def mode_for(self, device_id: str) -> str:
+        return self._device_modes.get(device_id, self._mode)
+
+    def tolerance(self, device_id: str, metric: str) -> float:
+        per_device = self._device_deviation.get(device_id, {})
+        return float(per_device.get(metric, self._deviation.get(metric, 0.0)))
+
+    def reset(self, device_id: str) -> None:
+        """
+        Forget the trend of a device, e.g. when persisting its readings failed: the next
+        reading then starts a new trend (and is stored) instead of being compared to a
+        pivot that never reached the database.
+        """
+        with self._lock:
+            self._trends.pop(device_id, None)
+
+    def offer(self, data: Dict[str, Any], force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Feed a normalized reading. Returns the readings to persist, oldest first
+        (empty when the reading is absorbed by the current trend).
+        `force=True` archives the reading regardless of tolerance.
+        """
+        device_id = data.get("device_id", "")
+        mode = self.mode_for(device_id)
+        if mode == COMPRESSION_OFF or not device_id:
+            return [data]
+
+        with self._lock:
+            trend = self._trends.get(device_id)
+            if trend is None:
+                self._trends[device_id] = _DeviceTrend(archived=data)
+                return [data]
+
+            last = trend.held or trend.archived
+            if _epoch(data["ts"]) <= _epoch(last["ts"]):
+                # Out-of-order/duplicate timestamp: store as-is, keep the trend untouched.
+                return [data]
+
+            if force or data.get("anomalies"):
+                return self._archive_current(trend, data)
+
+            if self._max_interval_s and _epoch(data["ts"]) - _epoch(trend.archived["ts"]) > self._max_interval_s:
+                return self._archive_current(trend, data)
+
+            if mode == COMPRESSION_DEADBAND:
+                if self._exceeds_deadband(device_id, trend.archived, data):
+                    return self._archive_current(trend, data)
+                trend.held = data
+                return []
+
+            return self._offer_sdt(device_id, trend, data)
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        Return held (not yet persisted) readings, e.g. on shutdown, and archive them.
+        """
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            for trend in self._trends.values():
+                if trend.held is not None:
+                    out.append(trend.held)
+                    trend.archived = trend.held
+                    trend.held = None
+                    trend.doors = {}
+        return out
+
+    def _archive_current(self, trend: _DeviceTrend, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        out = []
+        if trend.held is not None and self.mode_for(data["device_id"]) == COMPRESSION_SDT:
+            # SDT needs the held point as the end of the current segment.
+            out.append(trend.held)
+        out.append(data)
+        trend.archived = data
+        trend.held = None
+        trend.doors = {}
+        return out
+
+    def _exceeds_deadband(self, device_id: str, ref: Dict[str, Any], data: Dict[str, Any]) -> bool:
+        for metric in METRICS:
+            a, b = ref.get(metric), data.get(metric)
+            if a is None or b is None:
+                if a is not b:
+                    return True
+                continue
+            if abs(b - a) > self.tolerance(device_id, metric):
+                return True
+        return False
+
+    def _offer_sdt(self, device_id: str, trend: _DeviceTrend, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        doors = self._sdt_doors(device_id, trend.archived, trend.doors, data)
+        if doors is not None:
+            trend.doors = doors
+            trend.held = data
+            return []
+
+        # Door closed: the held point ends the segment and becomes the new pivot.
+        out: List[Dict[str, Any]] = []
+        if trend.held is not None:
+            out.append(trend.held)
+            trend.archived = trend.held
+            trend.held = None
+            trend.doors = {}
+            doors = self._sdt_doors(device_id, trend.archived, {}, data)
+
+        if doors is None:
+            # Not even representable from the new pivot (e.g. metric appeared/disappeared).
+            out.append(data)
+            trend.archived = data
+            trend.doors = {}
+        else:
+            trend.doors = doors
+            trend.held = data
+        return out
+
+    def _sdt_doors(
+        self,
+        device_id: str,
+        pivot: Dict[str, Any],
+        doors: Dict[str, Tuple[float, float]],
+        data: Dict[str, Any],
+    ) -> Optional[Dict[str, Tuple[float, float]]]:
+        """
+        Narrow the doors with `data`. Returns None when any door closes.
+        """
+        dt = _epoch(data["ts"]) - _epoch(pivot["ts"])
+        out: Dict[str, Tuple[float, float]] = {}
+        for metric in METRICS:
+            a, b = pivot.get(metric), data.get(metric)
+            if a is None or b is None:
+                if a is not b:
+                    return None
+                continue
+            tol = self.tolerance(device_id, metric)
+            upper = (b - (a + tol)) / dt
+            lower = (b - (a - tol)) / dt
+            if metric in doors:
+                upper = max(upper, doors[metric][0])
+                lower = min(lower, doors[metric][1])
+            # The stored segment pivot -> data must itself stay inside the doors,
+            # otherwise rebuilding by linear interpolation could exceed the tolerance.
+            slope = (b - a) / dt
+            if not upper <= slope <= lower:
+                return None
+            out[metric] = (upper, lower)
+        return out
+
+
+def interpolate_series(
+    points: List[Dict[str, Any]],
+    ts_from: datetime,
+    ts_to: datetime,
+    step_s: int,
+    method: str = "linear",
+) -> List[Dict[str, Any]]:
+    """
+    Rebuild a regular series from persisted (compressed) points sorted by ts.
+
+    method="linear" matches SDT/uncompressed storage, method="previous" matches deadband
+    (value holds until the next persisted row). Buckets outside the persisted range are
+    returned with None values.
+    """
+    start, end = _epoch(ts_from), _epoch(ts_to)
+    times = [_epoch(p["ts"]) for p in points]
+    out: List[Dict[str, Any]] = []
+
+    i = 0
+    t = start
+    while t <= end:
+        while i + 1 < len(times) and times[i + 1] <= t:
+            i += 1
+        row: Dict[str, Any] = {"ts": datetime.fromtimestamp(t, tz=timezone.utc)}
+        for metric in METRICS:
+            row[metric] = None
+
+        if times and times[0] <= t:
+            left = points[i]
+            right = points[i + 1] if i + 1 < len(points) else None
+            for metric in METRICS:
+                a = left.get(metric)
+                if method == "previous" or t == times[i]:
+                    row[metric] = a
+                elif right is not None:
+                    b = right.get(metric)
+                    if a is not None and b is not None:
+                        frac = (t - times[i]) / (times[i + 1] - times[i])
+                        row[metric] = a + (b - a) * frac
+        out.append(row)
+        t += step_s
+    return out
+
+
+def bucket_range(ts_from: datetime, ts_to: datetime, resolution_s: int) -> Tuple[datetime, int]:
+    """
+    Epoch-aligned buckets covering [ts_from, ts_to]: (start of the first bucket, bucket count).
+    """
+    start = int(_epoch(ts_from)) // resolution_s * resolution_s
+    n_buckets = int((_epoch(ts_to) - start) // resolution_s) + 1
+    return datetime.fromtimestamp(start, tz=timezone.utc), n_buckets
+
+
+def align_series(
+    points: List[Dict[str, Any]],
+    start: datetime,
+    n_buckets: int,
+    resolution_s: int,
+    metrics: Sequence[str] = METRICS,
+    method: str = "linear",
+) -> Dict[str, List[Optional[float]]]:
+    """
+    Columns (metric -> values) of the reconstructed series sampled at each bucket start,
+    so devices with different storage density line up on the same buckets.
+    """
+    end = start + timedelta(seconds=resolution_s * (n_buckets - 1))
+    series = interpolate_series(points, start, end, resolution_s, method=method)
+    return {m: [row[m] for row in series] for m in metrics}
+
+
+def fill_buckets(
+    reconstructed: Dict[str, List[Optional[float]]],
+    aggregates: Dict[int, Dict[str, Optional[float]]],
+    start: datetime,
+    resolution_s: int,
+) -> Dict[str, List[Optional[float]]]:
+    """
+    Overlay per-bucket aggregates (keyed by bucket start epoch) on the reconstructed
+    columns from align_series: stored data wins, reconstruction fills the gaps.
+    """
+    first = int(_epoch(start))
+    for bucket, values in aggregates.items():
+        i = (bucket - first) // resolution_s
+        for metric, column in reconstructed.items():
+            value = values.get(metric)
+            if value is not None and 0 <= i < len(column):
+                column[i] = float(value)
+    return reconstructed
@@ -0,0 +1,18 @@
+import pytest
+
+from app.core import database
+from app.core.config import settings
+from app.models import device, sensor_data  # noqa: F401  (register tables)
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """
+    Throwaway SQLite database behind get_session() (schema via init_db).
+    """
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "_session_factory", None)
+    database.init_db()
+    yield
+    database.get_engine().dispose()
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.api.v1 import data as data_api
+from app.core.database import get_session
+from app.main import create_app
+from app.models.sensor_data import SensorData
+from app.services import ingestion_service
+from app.services.processing_service import CompressionFilter, interpolate_series
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def reading(seconds: int, temperature: float) -> dict:
+    return {
+        "device_id": "machine_01",
+        "temperature_c": temperature,
+        "pressure_bar": None,
+        "vibration_mm_s": None,
+        "ts": T0 + timedelta(seconds=seconds),
+        "anomalies": [],
+    }
+
+
+def test_deadband_drops_small_changes() -> None:
+    f = CompressionFilter(mode="deadband", deviation={"temperature_c": 1.0})
+    stored = []
+    for i, t in enumerate([20.0, 20.4, 20.9, 21.5, 21.6]):
+        stored += f.offer(reading(i, t))
+    assert [r["temperature_c"] for r in stored] == [20.0, 21.5]
+    assert [r["temperature_c"] for r in f.flush()] == [21.6]
+
+
+def test_sdt_keeps_linear_trend_within_tolerance() -> None:
+    f = CompressionFilter(mode="sdt", deviation={"temperature_c": 0.5})
+    values = [20.0 + i for i in range(10)] + [29.0] * 5
+    stored = []
+    for i, t in enumerate(values):
+        stored += f.offer(reading(i, t))
+    stored += f.flush()
+
+    # Ramp then plateau: only the corners survive.
+    assert [r["temperature_c"] for r in stored] == [20.0, 29.0, 29.0]
+
+    series = interpolate_series(stored, T0, T0 + timedelta(seconds=14), step_s=1)
+    for original, rebuilt in zip(values, series):
+        assert abs(original - rebuilt["temperature_c"]) <= 0.5
+
+
+def test_anomalies_are_always_stored() -> None:
+    f = CompressionFilter(mode="deadband", deviation={"temperature_c": 100.0})
+    f.offer(reading(0, 20.0))
+    r = reading(1, 20.0)
+    r["anomalies"] = ["vibration_high"]
+    assert f.offer(r) == [r]
+
+
+@pytest.fixture
+def sdt(monkeypatch):
+    f = CompressionFilter(mode="sdt", deviation={"temperature_c": 0.5})
+    monkeypatch.setattr(ingestion_service, "compressor", f)
+    monkeypatch.setattr(data_api, "compressor", f)
+    return f
+
+
+def ingest_ramp(n: int) -> None:
+    for i in range(n):
+        r = reading(i, 20.0 + i)
+        ingestion_service.ingest_sensor_payload("factory/machine_01/sensors", {**r, "ts": r["ts"].isoformat()})
+
+
+def test_open_segment_is_queryable(sqlite_db, sdt) -> None:
+    ingest_ramp(5)
+
+    client = TestClient(create_app())
+    params = {
+        "device_id": "machine_01",
+        "ts_from": T0.isoformat(),
+        "ts_to": (T0 + timedelta(seconds=4)).isoformat(),
+        "step_s": 1,
+    }
+    resp = client.get("/api/v1/data/interpolated", params=params)
+    assert resp.status_code == 200
+    assert [p["temperature_c"] for p in resp.json()] == [20.0, 21.0, 22.0, 23.0, 24.0]
+
+
+def test_held_reading_recovered_after_crash(sqlite_db, sdt) -> None:
+    ingest_ramp(5)
+    ingestion_service.recover_held_readings()  # restart without flush_compressed()
+
+    with get_session() as session:
+        stored = session.execute(select(SensorData.temperature_c).order_by(SensorData.ts)).scalars().all()
+    assert stored == [20.0, 24.0]
+
+
+def test_trend_reset_when_persist_fails(sqlite_db, monkeypatch) -> None:
+    f = CompressionFilter(mode="deadband", deviation={"temperature_c": 1.0})
+    monkeypatch.setattr(ingestion_service, "compressor", f)
+    topic = "factory/machine_01/sensors"
+
+    def payload(seconds: int, temperature: float) -> dict:
+        ts = (T0 + timedelta(seconds=seconds)).isoformat()
+        return {"device_id": "machine_01", "temperature_c": temperature, "ts": ts}
+
+    ingestion_service.ingest_sensor_payload(topic, payload(0, 20.0))
+
+    real_persist = ingestion_service._persist
+
+    def failing_persist(*args, **kwargs):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(ingestion_service, "_persist", failing_persist)
+    with pytest.raises(RuntimeError):
+        ingestion_service.ingest_sensor_payload(topic, payload(1, 30.0))
+
+    monkeypatch.setattr(ingestion_service, "_persist", real_persist)
+    ingestion_service.ingest_sensor_payload(topic, payload(2, 30.0))
+
+    with get_session() as session:
+        stored = session.execute(select(SensorData.temperature_c).order_by(SensorData.ts)).scalars().all()
+    assert stored == [20.0, 30.0]
+
+
+def test_series_rows_are_bounded(sqlite_db, sdt, monkeypatch) -> None:
+    ingest_ramp(5)
+    ingestion_service.flush_compressed()  # two stored rows: 20.0 and 24.0
+    monkeypatch.setattr(data_api, "MAX_SERIES_ROWS", 1)
+
+    client = TestClient(create_app())
+    params = {
+        "device_id": "machine_01",
+        "ts_from": T0.isoformat(),
+        "ts_to": (T0 + timedelta(seconds=4)).isoformat(),
+    }
+    assert client.get("/api/v1/data/interpolated", params=params).status_code == 422
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import data as data_api
+from app.core.responses import ARROW_STREAM_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE
+from app.main import create_app
+from app.services.ingestion_service import ingest_sensor_payload
+from app.services.processing_service import align_series, bucket_range, fill_buckets
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_bucket_range_is_epoch_aligned() -> None:
+    start, n = bucket_range(T0 + timedelta(seconds=30), T0 + timedelta(seconds=120), 60)
+    assert start == T0
+    assert n == 3
+
+    start, n = bucket_range(T0, T0, 60)
+    assert (start, n) == (T0, 1)
+
+
+def test_align_series_fills_flat_periods() -> None:
+    # Deadband storage: 20.0 held until 25.0 is stored 3 minutes later.
+    points = [
+        {"ts": T0, "temperature_c": 20.0},
+        {"ts": T0 + timedelta(minutes=3), "temperature_c": 25.0},
+    ]
+    held = align_series(points, T0, 4, 60, metrics=["temperature_c"], method="previous")
+    assert held == {"temperature_c": [20.0, 20.0, 20.0, 25.0]}
+
+    linear = align_series(points, T0, 4, 60, metrics=["temperature_c"])
+    assert linear["temperature_c"][1] == pytest.approx(20.0 + 5.0 / 3)
+
+
+@pytest.fixture
+def client(sqlite_db) -> TestClient:
+    client = TestClient(create_app())
+    for device_id, location in [("m1", "line_A"), ("m2", "line_A"), ("m3", "line_B")]:
+        resp = client.post("/api/v1/devices", json={"device_id": device_id, "name": device_id, "location": location})
+        assert resp.status_code == 201
+        for i in range(3):
+            ts = (T0 + timedelta(seconds=60 * i)).isoformat()
+            ingest_sensor_payload("factory/test", {"device_id": device_id, "temperature_c": 10.0 * i, "ts": ts})
+    return client
+
+
+def params(**extra) -> dict:
+    return {"ts_from": T0.isoformat(), "ts_to": (T0 + timedelta(seconds=120)).isoformat(), **extra}
+
+
+def test_fleet_merges_devices_and_location(client) -> None:
+    query = params(device_id=["m3", "m1"], location="line_A", metric="temperature_c")
+    resp = client.get("/api/v1/data/fleet", params=query)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert list(body["series"]) == ["m3", "m1", "m2"]
+    assert body["ts"] == ["2024-01-01T00:00:00Z", "2024-01-01T00:01:00Z", "2024-01-01T00:02:00Z"]
+    assert body["series"]["m2"] == {"temperature_c": [0.0, 10.0, 20.0]}
+
+
+def test_fleet_validation_and_limits(client, monkeypatch) -> None:
+    assert client.get("/api/v1/data/fleet", params=params(device_id="m1", metric="humidity")).status_code == 422
+    assert client.get("/api/v1/data/fleet", params=params()).status_code == 422
+
+    monkeypatch.setattr(data_api, "MAX_FLEET_BUCKETS", 2)
+    assert client.get("/api/v1/data/fleet", params=params(device_id="m1")).status_code == 422
+
+    monkeypatch.setattr(data_api, "MAX_FLEET_BUCKETS", 5000)
+    monkeypatch.setattr(data_api, "MAX_FLEET_DEVICES", 1)
+    assert client.get("/api/v1/data/fleet", params=params(location="line_A")).status_code == 422
+
+
+def test_fleet_formats(client) -> None:
+    resp = client.get(
+        "/api/v1/data/fleet",
+        params=params(device_id="m1"),
+        headers={"Accept": COLUMNAR_JSON_MEDIA_TYPE},
+    )
+    assert resp.headers["content-type"] == COLUMNAR_JSON_MEDIA_TYPE
+    assert orjson.loads(resp.content)["series"]["m1"]["temperature_c"] == [0.0, 10.0, 20.0]
+
+    pa = pytest.importorskip("pyarrow")
+    resp = client.get(
+        "/api/v1/data/fleet",
+        params=params(device_id=["m1", "m2"]),
+        headers={"Accept": ARROW_STREAM_MEDIA_TYPE},
+    )
+    table = pa.ipc.open_stream(resp.content).read_all()
+    assert table.column("device_id").to_pylist() == ["m1"] * 3 + ["m2"] * 3
+
+
+def test_fill_buckets_prefers_stored_averages() -> None:
+    reconstructed = {"temperature_c": [1.0, 2.0, 3.0]}
+    filled = fill_buckets(reconstructed, {int(T0.timestamp()) + 60: {"temperature_c": 9.5}}, T0, 60)
+    assert filled == {"temperature_c": [1.0, 9.5, 3.0]}
+
+
+def test_fleet_averages_buckets_and_fills_gaps(sqlite_db) -> None:
+    client = TestClient(create_app())
+    readings = [
+        (-86400, 5.0),  # sparse device: last report a day before the window
+        (60, 10.0),
+        (80, 100.0),  # spike inside the bucket must show up in its average
+        (100, 10.0),
+        (240, 30.0),
+    ]
+    for seconds, temperature in readings:
+        ts = (T0 + timedelta(seconds=seconds)).isoformat()
+        ingest_sensor_payload("factory/test", {"device_id": "m9", "temperature_c": temperature, "ts": ts})
+
+    query = {
+        "ts_from": T0.isoformat(),
+        "ts_to": (T0 + timedelta(seconds=240)).isoformat(),
+        "device_id": "m9",
+        "metric": "temperature_c",
+    }
+    values = client.get("/api/v1/data/fleet", params=query).json()["series"]["m9"]["temperature_c"]
+
+    assert values[0] == pytest.approx(5.0 + (10.0 - 5.0) * 86400 / 86460)  # leading bucket from the old edge row
+    assert values[1] == pytest.approx(40.0)
+    assert values[2] == pytest.approx(10.0 + 20.0 * 20 / 140)  # empty: interpolated 100 s -> 240 s
+    assert values[4] == 30.0
@@ -1,5 +1,8 @@
+import pytest
 from fastapi.testclient import TestClient
 
+from app import main
+from app.core.config import settings
 from app.main import create_app
 
 
@@ -9,3 +12,83 @@ def test_health() -> None:
     resp = client.get("/api/v1/health")
     assert resp.status_code == 200
     assert resp.json()["status"] == "ok"
+
+
+def test_not_ready_before_startup() -> None:
+    app = create_app()
+    client = TestClient(app)  # no context manager: startup (db init) has not run
+    resp = client.get("/api/v1/health/ready")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["database"] == "not_initialized"
+
+
+@pytest.fixture
+def api_role(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "app_role", "api")
+    monkeypatch.setattr(settings, "db_init", "skip")
+
+
+def test_readiness_reports_missing_database_url(api_role, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "database_url", None)
+    with TestClient(create_app()) as client:
+        resp = client.get("/api/v1/health/ready")
+    assert resp.status_code == 503
+    assert resp.json()["checks"] == {"database": "not_configured"}
+
+
+def test_ready_with_database(api_role, sqlite_db) -> None:
+    with TestClient(create_app()) as client:
+        resp = client.get("/api/v1/health/ready")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ready", "checks": {"database": "ok"}}
+
+
+def test_deferred_init_retries(api_role, sqlite_db, monkeypatch) -> None:
+    attempts = []
+
+    def flaky_init_db() -> None:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("database starting up")
+
+    monkeypatch.setattr(settings, "db_init", "deferred")
+    monkeypatch.setattr(main, "init_db", flaky_init_db)
+    monkeypatch.setattr(main, "DB_INIT_RETRY_MIN_S", 0.01)
+
+    app = create_app()
+    with TestClient(app):
+        assert app.state.db_initialized.wait(timeout=5)
+    assert len(attempts) == 3
+
+
+def test_consumer_starts_after_deferred_init(sqlite_db, monkeypatch) -> None:
+    from app.core import mqtt_client
+
+    started = []
+    init_calls = []
+
+    class FakeConsumer:
+        connected = False
+
+        def start(self) -> None:
+            started.append(len(init_calls))
+
+        def stop(self) -> None:
+            pass
+
+    def flaky_init_db() -> None:
+        init_calls.append(1)
+        if len(init_calls) < 2:
+            raise RuntimeError("database starting up")
+
+    monkeypatch.setattr(settings, "app_role", "ingest")
+    monkeypatch.setattr(settings, "db_init", "deferred")
+    monkeypatch.setattr(mqtt_client, "MqttConsumer", FakeConsumer)
+    monkeypatch.setattr(main, "init_db", flaky_init_db)
+    monkeypatch.setattr(main, "DB_INIT_RETRY_MIN_S", 0.01)
+
+    app = create_app()
+    with TestClient(app):
+        assert app.state.db_initialized.wait(timeout=5)
+    # Started exactly once, only after the successful (second) init attempt.
+    assert started == [2]
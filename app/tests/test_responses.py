@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+import orjson
+
+from app.core.responses import (
+    ARROW_STREAM_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    negotiate_media_type,
+    table_response,
+)
+
+
+def test_negotiate_media_type() -> None:
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("*/*") == JSON_MEDIA_TYPE
+    assert negotiate_media_type(f"{COLUMNAR_JSON_MEDIA_TYPE}, */*;q=0.1") == COLUMNAR_JSON_MEDIA_TYPE
+
+
+def test_table_response_shapes() -> None:
+    columns = ["device_id", "temperature_c"]
+    rows = [("m1", 20.5), ("m2", None)]
+
+    resp = table_response(columns, rows, JSON_MEDIA_TYPE)
+    assert orjson.loads(resp.body) == [
+        {"device_id": "m1", "temperature_c": 20.5},
+        {"device_id": "m2", "temperature_c": None},
+    ]
+
+    resp = table_response(columns, rows, COLUMNAR_JSON_MEDIA_TYPE)
+    assert orjson.loads(resp.body) == {
+        "columns": columns,
+        "data": {"device_id": ["m1", "m2"], "temperature_c": [20.5, None]},
+    }
+
+    resp = table_response(columns, [], COLUMNAR_JSON_MEDIA_TYPE)
+    assert orjson.loads(resp.body)["data"] == {"device_id": [], "temperature_c": []}
+
+
+def test_negotiate_media_type_honours_q_values() -> None:
+    assert negotiate_media_type(f"{ARROW_STREAM_MEDIA_TYPE};q=0, application/json") == JSON_MEDIA_TYPE
+    assert negotiate_media_type(f"application/json;q=0.5, {COLUMNAR_JSON_MEDIA_TYPE}") == COLUMNAR_JSON_MEDIA_TYPE
+    assert negotiate_media_type(f"{ARROW_STREAM_MEDIA_TYPE}, */*") == ARROW_STREAM_MEDIA_TYPE
+    assert negotiate_media_type("text/html") == JSON_MEDIA_TYPE
+
+
+def test_utc_datetimes_keep_z_suffix() -> None:
+    ts = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    resp = table_response(["ts"], [(ts,)], JSON_MEDIA_TYPE)
+    assert orjson.loads(resp.body) == [{"ts": "2024-01-01T00:00:00Z"}]
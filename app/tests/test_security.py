@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.security import (
+    ApiKeyStore,
+    TokenVerifier,
+    create_signed_token,
+    generate_api_key,
+    hash_api_key,
+    verify_signed_token,
+)
+from app.main import create_app
+
+
+def test_signed_token_roundtrip() -> None:
+    token = create_signed_token("gateway-1", "s3cret", scopes=["data:write"])
+    claims = verify_signed_token(token, "s3cret")
+    assert claims["subject"] == "gateway-1"
+    assert claims["scopes"] == ["data:write"]
+
+    with pytest.raises(HTTPException):
+        verify_signed_token(token, "other")
+    with pytest.raises(HTTPException):
+        verify_signed_token(token.replace("data:write", "*"), "s3cret")
+
+
+def test_token_verifier_caches_and_checks_expiry() -> None:
+    verifier = TokenVerifier("s3cret", cache_size=1)
+    token = create_signed_token("gateway-1", "s3cret", scopes=["data:read"])
+    assert verifier.verify(token) is verifier.verify(token)
+
+    expired = create_signed_token("gateway-1", "s3cret", expires_in_seconds=-10)
+    with pytest.raises(HTTPException):
+        verifier.verify(expired)
+
+
+def test_api_key_store_reloads_on_change(tmp_path) -> None:
+    key_a, key_b = generate_api_key(), generate_api_key()
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps([{"name": "a", "key_sha256": hash_api_key(key_a), "scopes": ["data:read"]}]))
+
+    store = ApiKeyStore(str(path), legacy_key=None, reload_s=0)
+    assert store.lookup(key_a).scopes == {"data:read"}
+    assert store.lookup(key_b) is None
+
+    path.write_text(json.dumps([{"name": "b", "key_sha256": hash_api_key(key_b), "scopes": ["*"]}]))
+    os.utime(path, (0, 12345))
+    assert store.lookup(key_a) is None
+    assert store.lookup(key_b).name == "b"
+
+
+def test_create_signed_token_rejects_separators() -> None:
+    with pytest.raises(ValueError):
+        create_signed_token("a|b", "s3cret")
+    with pytest.raises(ValueError):
+        create_signed_token("gateway-1", "s3cret", scopes=["data:read,data:write"])
+
+
+def test_legacy_key_survives_bad_keys_file(tmp_path) -> None:
+    missing = ApiKeyStore(str(tmp_path / "missing.json"), legacy_key="legacy", reload_s=0)
+    assert missing.lookup("legacy").name == "default"
+
+    path = tmp_path / "keys.json"
+    path.write_text("not json")
+    malformed = ApiKeyStore(str(path), legacy_key="legacy", reload_s=0)
+    assert malformed.lookup("legacy").name == "default"
+
+
+@pytest.fixture
+def client(sqlite_db, tmp_path, monkeypatch) -> TestClient:
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps([{"name": "ro", "key_sha256": hash_api_key("read-key"), "scopes": ["devices:read"]}]))
+    monkeypatch.setattr(security, "api_key_store", ApiKeyStore(str(path), legacy_key=None, reload_s=60))
+    monkeypatch.setattr(security, "token_verifier", TokenVerifier("s3cret"))
+    return TestClient(create_app())
+
+
+def test_routes_require_credentials(client) -> None:
+    assert client.get("/api/v1/health").status_code == 200
+    assert client.get("/api/v1/devices").status_code == 401
+    assert client.get("/api/v1/devices", headers={"X-API-Key": "wrong"}).status_code == 401
+    assert client.get("/api/v1/devices", headers={"X-API-Key": "read-key"}).status_code == 200
+
+
+def test_routes_enforce_scopes(client) -> None:
+    headers = {"X-API-Key": "read-key"}
+    assert client.post("/api/v1/devices", headers=headers, json={"device_id": "m1", "name": "m1"}).status_code == 403
+    assert client.get("/api/v1/data", headers=headers).status_code == 403
+
+
+def test_routes_accept_bearer_tokens(client) -> None:
+    token = create_signed_token("gateway-1", "s3cret", scopes=["data:read"])
+    assert client.get("/api/v1/data", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert client.get("/api/v1/devices", headers={"Authorization": f"Bearer {token}"}).status_code == 403
+
+    forged = create_signed_token("gateway-1", "other", scopes=["*"])
+    assert client.get("/api/v1/data", headers={"Authorization": f"Bearer {forged}"}).status_code == 401
+
+
+def test_auth_off_when_nothing_configured(sqlite_db, monkeypatch) -> None:
+    monkeypatch.setattr(security, "api_key_store", ApiKeyStore(None, legacy_key=None, reload_s=60))
+    monkeypatch.setattr(security, "token_verifier", None)
+    client = TestClient(create_app())
+    assert client.get("/api/v1/devices").status_code == 200
+
+
+def test_deleting_keys_file_revokes_its_keys(tmp_path, caplog) -> None:
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps([{"name": "k", "key_sha256": hash_api_key("k"), "scopes": ["*"]}]))
+    store = ApiKeyStore(str(path), legacy_key="legacy", reload_s=0)
+    assert store.lookup("k").name == "k"
+
+    os.remove(path)
+    with caplog.at_level("WARNING", logger="app.core.security"):
+        assert store.lookup("k") is None
+        assert store.lookup("legacy").name == "default"
+    assert len([r for r in caplog.records if "not found" in r.getMessage()]) == 1
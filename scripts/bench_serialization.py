@@ -0,0 +1,92 @@
+
+"""
+Compare the /data response paths without a database.
+
+  legacy: ORM rows -> SensorDataOut.model_validate -> response_model re-validation
+          -> jsonable_encoder -> json.dumps (what FastAPI does with response_model)
+  fast:   column tuples -> orjson (row JSON / columnar JSON / Arrow if installed)
+
+Run from the repo root:
+  PYTHONPATH=. python scripts/bench_serialization.py --rows 1000
+"""
+
+import argparse
+import json
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.responses import (
+    ARROW_STREAM_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    table_response,
+)
+from app.models.sensor_data import SensorData
+from app.schemas.sensor_data import SensorDataOut
+
+COLUMNS = list(SensorDataOut.model_fields)
+
+
+def make_rows(n: int) -> list[tuple]:
+    now = datetime.now(timezone.utc)
+    return [
+        (
+            i,
+            f"machine_{i % 8:02d}",
+            round(random.uniform(15.0, 95.0), 2),
+            round(random.uniform(0.8, 8.5), 3),
+            round(random.uniform(0.0, 25.0), 3),
+            now - timedelta(seconds=i),
+            now,
+            "factory/machine_01/sensors",
+        )
+        for i in range(n)
+    ]
+
+
+def legacy(entities: list[SensorData], adapter: TypeAdapter) -> bytes:
+    out = [SensorDataOut.model_validate(r) for r in entities]
+    validated = adapter.validate_python(out, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def fast(rows: list[tuple], media_type: str) -> bytes:
+    return table_response(COLUMNS, rows, media_type).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    entities = [SensorData(**dict(zip(COLUMNS, r))) for r in rows]
+    adapter = TypeAdapter(list[SensorDataOut])
+
+    cases = {
+        "legacy (ORM + validate + json)": lambda: legacy(entities, adapter),
+        "fast json": lambda: fast(rows, JSON_MEDIA_TYPE),
+        "fast columnar json": lambda: fast(rows, COLUMNAR_JSON_MEDIA_TYPE),
+    }
+    try:
+        import pyarrow  # noqa: F401
+
+        cases["fast arrow ipc"] = lambda: fast(rows, ARROW_STREAM_MEDIA_TYPE)
+    except ImportError:
+        pass
+
+    baseline = None
+    for name, fn in cases.items():
+        size = len(fn())
+        per_call = min(timeit.repeat(fn, number=args.repeat, repeat=3)) / args.repeat
+        baseline = baseline or per_call
+        print(f"{name:32s} {per_call * 1000:8.3f} ms  {size / 1024:8.1f} KiB  x{baseline / per_call:5.1f}")
+
+
+if __name__ == "__main__":
+    main()